@@ -5,13 +5,27 @@ Optional local client for EdgeFlow V2.
 Example
 python3 pc/client_submit.py --host http://127.0.0.1:8080 \
   --model model_fp32.bin --meta model_meta.json --input input.npy --out pred.npy
+
+Add --compress to upload the input as a Blosc2 frame (needs numpy and blosc2).
 """
 from __future__ import annotations
 import argparse
+import contextlib
 import sys
 import pathlib
 import requests
 
+BLOSC2_ENCODING = "x-blosc2"
+
+def _pack_blosc2(path: str) -> bytes:
+    import numpy as np
+    import blosc2
+    # The server only accepts float32 frames.
+    arr = np.ascontiguousarray(np.load(path, allow_pickle=False), dtype=np.float32)
+    return blosc2.pack_array2(
+        arr, cparams={"codec": blosc2.Codec.ZSTD, "clevel": 1, "filters": [blosc2.Filter.SHUFFLE]}
+    )
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--host", default="http://127.0.0.1:8080")
@@ -20,28 +34,30 @@ def main() -> int:
     ap.add_argument("--meta", default=None, help="optional model_meta.json")
     ap.add_argument("--out", default="pred.npy", help="output pred.npy")
     ap.add_argument("--json", action="store_true", help="use /v2/infer JSON endpoint instead of /v2/infer_npy")
+    ap.add_argument("--compress", action="store_true", help="upload input as a Blosc2 (zstd+shuffle) frame")
     args = ap.parse_args()
 
-    files = {"input_npy": open(args.input, "rb")}
-    if args.model:
-        files["model_bin"] = open(args.model, "rb")
-    if args.meta:
-        files["model_meta"] = open(args.meta, "rb")
+    data = {}
+    with contextlib.ExitStack() as stack:
+        if args.compress:
+            files = {"input_npy": (pathlib.Path(args.input).name + ".b2", _pack_blosc2(args.input), "application/octet-stream")}
+            data["input_encoding"] = BLOSC2_ENCODING
+        else:
+            files = {"input_npy": stack.enter_context(open(args.input, "rb"))}
+        if args.model:
+            files["model_bin"] = stack.enter_context(open(args.model, "rb"))
+        if args.meta:
+            files["model_meta"] = stack.enter_context(open(args.meta, "rb"))
 
-    try:
         if args.json:
-            r = requests.post(args.host.rstrip("/") + "/v2/infer", files=files, timeout=600)
+            r = requests.post(args.host.rstrip("/") + "/v2/infer", files=files, data=data, timeout=600)
             r.raise_for_status()
             print(r.json())
         else:
-            r = requests.post(args.host.rstrip("/") + "/v2/infer_npy", files=files, timeout=600)
+            r = requests.post(args.host.rstrip("/") + "/v2/infer_npy", files=files, data=data, timeout=600)
             r.raise_for_status()
             pathlib.Path(args.out).write_bytes(r.content)
             print(f"wrote {args.out}")
-    finally:
-        for f in files.values():
-            try: f.close()
-            except Exception: pass
     return 0
 
 if __name__ == "__main__":
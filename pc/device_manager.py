@@ -2,17 +2,29 @@
 from __future__ import annotations
 
 import os
+import sys
 import time
+import atexit
+import shutil
+import functools
 import subprocess
 import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple, Union
 
 import numpy as np
 import serial
 from dataclasses import asdict
 
-from .protocol import query_info, infer_one, DeviceInfo
+from .protocol import (
+    DEVICE_RX_BUF_BYTES,
+    DeviceInfo,
+    discard_input,
+    infr_frame_bytes,
+    query_info,
+    recv_pred_into,
+    send_infer,
+)
 
 
 def _run(cmd: list[str], timeout_s: int) -> Tuple[int, str, str]:
@@ -23,18 +35,98 @@ def _run(cmd: list[str], timeout_s: int) -> Tuple[int, str, str]:
             stderr=subprocess.PIPE,
             text=True,
             timeout=timeout_s,
-            env=os.environ.copy(),
         )
         return p.returncode, p.stdout, p.stderr
     except subprocess.TimeoutExpired as e:
         raise TimeoutError(f"timeout running: {' '.join(cmd)} after {timeout_s}s") from e
 
 
-def _atomic_write_bytes(path: Path, data: bytes) -> None:
+def _tune_port(ser: serial.Serial) -> None:
+    """Best-effort driver tuning for low UART round-trip latency.
+
+    Linux: set ASYNC_LOW_LATENCY (via TIOCSSERIAL) to drop the ~16 ms latency
+    timer of USB-serial bridges. Windows: enlarge the 4 KiB driver buffers.
+    Drivers that do not support this (e.g. CDC-ACM) are left as-is.
+    """
+    try:
+        if sys.platform == "win32":
+            ser.set_buffer_size(rx_size=65536, tx_size=65536)
+        elif sys.platform.startswith("linux"):
+            ser.set_low_latency_mode(True)
+    except Exception:
+        pass
+
+
+_WRITE_CHUNK = 1 << 20
+
+
+@functools.lru_cache(maxsize=None)
+def _needs_fsync(directory: Path) -> bool:
+    """False if directory is on a RAM-backed filesystem, where fsync buys nothing."""
+    try:
+        mounts = Path("/proc/self/mounts").read_text().splitlines()
+    except OSError:
+        return True
+    d = str(directory.resolve())
+    best, fstype = "", ""
+    for line in mounts:
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        mnt = parts[1].replace("\\040", " ")
+        if (d == mnt or d.startswith(mnt.rstrip("/") + "/")) and len(mnt) > len(best):
+            best, fstype = mnt, parts[2]
+    return fstype not in ("tmpfs", "ramfs")
+
+
+def _write_all(fd: int, data: Union[bytes, memoryview]) -> None:
+    mv = memoryview(data)
+    while mv:
+        n = os.write(fd, mv[:_WRITE_CHUNK])
+        mv = mv[n:]
+
+
+def _atomic_write_bytes(path: Path, data: Union[bytes, BinaryIO]) -> None:
+    """Write bytes (or stream a binary file object) to path via fsync + rename.
+
+    The fsync keeps a crash during model upload from leaving a truncated file
+    for the next SPIFFS image build.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_bytes(data)
-    tmp.replace(path)
+    fd = os.open(str(tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            _write_all(fd, data)
+        else:
+            while True:
+                chunk = data.read(_WRITE_CHUNK)
+                if not chunk:
+                    break
+                _write_all(fd, chunk)
+        if _needs_fsync(tmp.parent):
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(str(tmp), str(path))
+
+
+def _as_batch(x: np.ndarray) -> np.ndarray:
+    """Validate x and return it as a C-contiguous float32 (N,T,F) array."""
+    if not isinstance(x, np.ndarray):
+        raise TypeError("x must be a numpy array")
+
+    if x.ndim == 2:
+        x = x[None, ...]
+    if x.ndim != 3:
+        raise ValueError(f"input must have shape (T,F) or (N,T,F), got {x.shape}")
+    # One contiguous float32 copy (if any) up front; rows are then sliced without copying.
+    return np.ascontiguousarray(x, dtype=np.float32)
+
+
+def _byte_view(a: np.ndarray) -> memoryview:
+    """Flat writable byte view of a C-contiguous array (also valid for N == 0)."""
+    return memoryview(a.reshape(-1).view(np.uint8))
 
 
 class DeviceManager:
@@ -45,25 +137,43 @@ class DeviceManager:
         idf_baud: int = 921600,
         esp_project: Optional[Path] = None,
         probe_timeout_s: float = 6.0,
+        write_timeout_s: float = 10.0,
+        info_ttl_s: float = 2.0,
     ) -> None:
         self.serial_port = serial_port
         self.uart_baud = int(uart_baud)
         self.idf_baud = int(idf_baud)
         self.probe_timeout_s = float(probe_timeout_s)
+        self.write_timeout_s = float(write_timeout_s)
 
         self.esp_project = esp_project or (Path(__file__).resolve().parents[1] / "esp32" / "model_client")
         self.spiffs_dir = self.esp_project / "spiffs_image"
 
+        self._idf_exe = shutil.which("idf.py") or "idf.py"
+        self._built = False
+
         # Critical: must be re-entrant because flash_model() may call probe_info()
         self._lock = threading.RLock()
 
+        # The port stays open across requests; DeviceInfo is cached until the
+        # next flash (or until the link fails and the port is reopened).
+        self._ser: Optional[serial.Serial] = None
+        self._info: Optional[DeviceInfo] = None
+        # probe_info() answers from the cache for this long (health-check bursts).
+        self._info_ts = 0.0
+        self._info_ttl = float(info_ttl_s)
+        atexit.register(self.close)
+
     def ensure_built(self) -> None:
+        if self._built:
+            return
         build_ninja = self.esp_project / "build" / "build.ninja"
         if not build_ninja.exists():
             self._idf("build", timeout_s=1800)
+        self._built = True
 
     def _idf(self, *args: str, timeout_s: int = 900) -> Dict[str, Any]:
-        cmd = ["idf.py", "-C", str(self.esp_project), "-p", self.serial_port, "-b", str(self.idf_baud), *args]
+        cmd = [self._idf_exe, "-C", str(self.esp_project), "-p", self.serial_port, "-b", str(self.idf_baud), *args]
         t0 = time.time()
         rc, out, err = _run(cmd, timeout_s=timeout_s)
         dt = time.time() - t0
@@ -77,21 +187,65 @@ class DeviceManager:
             )
         return {"cmd": cmd, "seconds": dt, "stdout": out, "stderr": err}
 
-    def _probe_info_nolock(self) -> DeviceInfo:
-        with serial.Serial(self.serial_port, self.uart_baud, timeout=0.1) as ser:
+    def _get_ser(self) -> serial.Serial:
+        """Return the cached serial handle, opening it on first use."""
+        if self._ser is None:
+            ser = serial.Serial(
+                self.serial_port,
+                self.uart_baud,
+                timeout=0.1,
+                write_timeout=self.write_timeout_s,
+            )
+            _tune_port(ser)
             try:
                 ser.reset_input_buffer()
                 ser.reset_output_buffer()
             except Exception:
                 pass
-            return query_info(ser, timeout_s=self.probe_timeout_s)
+            discard_input(ser)
+            self._ser = ser
+        return self._ser
+
+    def _close_nolock(self) -> None:
+        ser, self._ser = self._ser, None
+        self._info = None
+        self._info_ts = 0.0
+        if ser is not None:
+            discard_input(ser)
+            try:
+                ser.close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_nolock()
+
+    def _probe_info_nolock(self) -> DeviceInfo:
+        try:
+            self._info = query_info(self._get_ser(), timeout_s=self.probe_timeout_s)
+        except Exception:
+            self._close_nolock()
+            raise
+        self._info_ts = time.monotonic()
+        return self._info
 
     def probe_info(self) -> DeviceInfo:
+        # Lock-free fast path: a probe younger than the TTL is reused.
+        info = self._info
+        if info is not None and time.monotonic() - self._info_ts < self._info_ttl:
+            return info
         with self._lock:
             return self._probe_info_nolock()
 
-    def flash_model(self, model_bin: bytes, model_meta: Optional[bytes] = None) -> Dict[str, Any]:
+    def flash_model(
+        self,
+        model_bin: Union[bytes, BinaryIO],
+        model_meta: Optional[Union[bytes, BinaryIO]] = None,
+    ) -> Dict[str, Any]:
         with self._lock:
+            # The device reboots during model-flash and idf.py needs the port.
+            self._close_nolock()
             self.ensure_built()
             self.spiffs_dir.mkdir(parents=True, exist_ok=True)
             _atomic_write_bytes(self.spiffs_dir / "model_fp32.bin", model_bin)
@@ -107,41 +261,81 @@ class DeviceManager:
             info = self._probe_info_nolock()
             return {"model_flash": flash_res, "device_info": asdict(info)}
 
-    def infer(self, x: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
-        if not isinstance(x, np.ndarray):
-            raise TypeError("x must be a numpy array")
-        if x.dtype != np.float32:
-            x = x.astype(np.float32, copy=False)
+    def _device_info_nolock(self) -> DeviceInfo:
+        return self._info if self._info is not None else self._probe_info_nolock()
+
+    def infer_iter(
+        self,
+        x: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        on_info: Optional[Callable[[DeviceInfo], None]] = None,
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (i, pred_i) as soon as each sample's prediction arrives.
 
-        if x.ndim == 2:
-            x = x[None, ...]
-        if x.ndim != 3:
-            raise ValueError(f"input must have shape (T,F) or (N,T,F), got {x.shape}")
+        pred_i is a view of row i of out (an (N,H) float32 array, allocated if not
+        given). on_info, if given, is called with the DeviceInfo used for this batch
+        once the input shape is validated and before any sample is sent (also for
+        N == 0). The device lock is held until the generator finishes, so consume it
+        on a single thread.
+        """
+        x = _as_batch(x)
+        with self._lock:
+            ser = self._get_ser()
+            info = self._device_info_nolock()
+            T, F, H = int(info.T), int(info.F), int(info.H)
+
+            if x.shape[1] != T or x.shape[2] != F:
+                raise ValueError(f"shape mismatch: got {x.shape}, device expects (N,{T},{F})")
+
+            n = x.shape[0]
+            if out is None:
+                out = np.empty((n, H), dtype=np.float32)
+            elif out.shape != (n, H) or out.dtype != np.float32 or not out.flags.c_contiguous:
+                raise ValueError(f"out must be a C-contiguous float32 array of shape ({n},{H})")
+            out_mv = _byte_view(out)
+            if on_info is not None:
+                on_info(info)
+
+            # Keep one sample in flight so the next upload overlaps device compute,
+            # unless a frame would overflow the firmware's RX buffer.
+            pipelined = infr_frame_bytes(T * F) <= DEVICE_RX_BUF_BYTES
+
+            row_nbytes = T * F * 4
+            mv = _byte_view(x)
+
+            def payload(i: int) -> memoryview:
+                return mv[i * row_nbytes : (i + 1) * row_nbytes]
+
+            try:
+                if n and pipelined:
+                    send_infer(ser, payload(0))
+                for i in range(n):
+                    if not pipelined:
+                        send_infer(ser, payload(i))
+                    elif i + 1 < n:
+                        send_infer(ser, payload(i + 1))
+                    recv_pred_into(ser, out_mv[i * H * 4 : (i + 1) * H * 4], timeout_s=10.0)
+                    yield i, out[i]
+            except BaseException:
+                # A frame may be half-read or still in flight (including when a
+                # stream is abandoned); reopen and resync on the next call.
+                self._close_nolock()
+                raise
+
+    def infer(self, x: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        x = _as_batch(x)
 
         with self._lock:
             t0 = time.time()
-            with serial.Serial(self.serial_port, self.uart_baud, timeout=0.1) as ser:
-                try:
-                    ser.reset_input_buffer()
-                    ser.reset_output_buffer()
-                except Exception:
-                    pass
-
-                info = query_info(ser, timeout_s=self.probe_timeout_s)
-                T, F, H = int(info.T), int(info.F), int(info.H)
-
-                if x.shape[1] != T or x.shape[2] != F:
-                    raise ValueError(f"shape mismatch: got {x.shape}, device expects (N,{T},{F})")
-
-                preds = np.zeros((x.shape[0], H), dtype=np.float32)
-                per_sample_ms = []
-
-                for i in range(x.shape[0]):
-                    payload = np.ascontiguousarray(x[i].reshape(-1)).tobytes()
-                    ts = time.time()
-                    y_bytes = infer_one(ser, payload, H, timeout_s=10.0)
-                    per_sample_ms.append((time.time() - ts) * 1000.0)
-                    preds[i] = np.frombuffer(y_bytes, dtype=np.float32, count=H)
+            info = self._device_info_nolock()
+            preds = np.empty((x.shape[0], int(info.H)), dtype=np.float32)
+            per_sample_ms = []
+
+            ts = time.time()
+            for _i, _y in self.infer_iter(x, out=preds):
+                te = time.time()
+                per_sample_ms.append((te - ts) * 1000.0)
+                ts = te
 
             total_ms = (time.time() - t0) * 1000.0
             return preds, {
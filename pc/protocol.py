@@ -10,7 +10,7 @@ Host -> Device
       Send one sample (flattened) for inference.
 
 Device -> Host
-  MAGIC_INFO (b'INFO') + uint32(T) + uint32(F) + uint32(H) + uint32(hidden)
+  MAGIC_INFO (b'INFO') + uint16(T) + uint16(F) + uint16(H) + uint16(hidden)
       Report model dimensions.
 
   MAGIC_PRED (b'PRED') + uint32(H) + float32[H]
@@ -18,13 +18,20 @@ Device -> Host
 
 The serial stream can include unrelated boot logs. The reader therefore scans
 for magic sequences rather than assuming alignment.
+
+Frames may be pipelined: the host can send the next INFR while the device is
+still computing the previous one. The firmware has no flow control, so this is
+only safe while a whole INFR frame fits in its UART0 RX ring buffer
+(DEVICE_RX_BUF_BYTES, set by uart_driver_install() in main.c).
 """
 
 from __future__ import annotations
 
 import struct
 import time
+import weakref
 from dataclasses import dataclass
+from typing import Union
 
 
 MAGIC_META = b"META"
@@ -32,6 +39,21 @@ MAGIC_INFO = b"INFO"
 MAGIC_INFR = b"INFR"
 MAGIC_PRED = b"PRED"
 
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# Precompiled formats for the per-request pack/unpack calls.
+_INFO_S = struct.Struct("<4H")
+_U32_S = struct.Struct("<I")
+_HEADER_LEN = _INFO_S.size
+
+# UART0 RX ring buffer size configured in esp32/model_client/main/main.c.
+DEVICE_RX_BUF_BYTES = 4096
+
+
+def infr_frame_bytes(nfloats: int) -> int:
+    """Size on the wire of one INFR frame carrying nfloats values."""
+    return len(MAGIC_INFR) + _U32_S.size + 4 * int(nfloats)
+
 
 @dataclass(frozen=True)
 class DeviceInfo:
@@ -41,10 +63,48 @@ class DeviceInfo:
     hidden: int
 
 
+class Framer:
+    """Receive buffer shared by every protocol call on one serial handle.
+
+    The stream is read in bulk, so bytes that arrive after a magic sequence are
+    kept here and handed to the next read instead of being lost.
+    """
+
+    def __init__(self) -> None:
+        self.buf = bytearray()
+
+    def clear(self) -> None:
+        self.buf.clear()
+
+
+_framers: "weakref.WeakKeyDictionary[object, Framer]" = weakref.WeakKeyDictionary()
+
+
+def _framer(ser) -> Framer:
+    fr = _framers.get(ser)
+    if fr is None:
+        fr = _framers[ser] = Framer()
+    return fr
+
+
+def discard_input(ser) -> None:
+    """Drop buffered host-side RX bytes (call alongside ser.reset_input_buffer())."""
+    fr = _framers.get(ser)
+    if fr is not None:
+        fr.clear()
+
+
 def _read_exact(ser, n: int, where: str, timeout_s: float) -> bytes:
     """Read exactly n bytes or raise TimeoutError."""
+    buf = _framer(ser).buf
+    if len(buf) >= n:
+        out = bytes(buf[:n])
+        del buf[:n]
+        return out
+
     deadline = time.time() + timeout_s
-    out = bytearray()
+    out = bytearray(buf)
+    buf.clear()
     while len(out) < n:
         if time.time() > deadline:
             raise TimeoutError(f"serial timeout at {where}: need={n} got={len(out)}")
@@ -54,24 +114,51 @@ def _read_exact(ser, n: int, where: str, timeout_s: float) -> bytes:
     return bytes(out)
 
 
+def _read_exact_into(ser, out: memoryview, where: str, timeout_s: float) -> None:
+    """Fill the writable byte buffer out completely or raise TimeoutError."""
+    n = len(out)
+    buf = _framer(ser).buf
+    got = min(n, len(buf))
+    if got:
+        out[:got] = buf[:got]
+        del buf[:got]
+
+    readinto = getattr(ser, "readinto", None)
+    deadline = time.time() + timeout_s
+    while got < n:
+        if time.time() > deadline:
+            raise TimeoutError(f"serial timeout at {where}: need={n} got={got}")
+        if readinto is not None:
+            got += readinto(out[got:]) or 0
+        else:
+            chunk = ser.read(n - got)
+            out[got : got + len(chunk)] = chunk
+            got += len(chunk)
+
+
 def _read_until_magic(ser, magic: bytes, where: str, timeout_s: float) -> None:
-    """Scan the stream until the 4-byte magic appears."""
+    """Scan the stream until the 4-byte magic appears.
+
+    Bytes following the magic stay in the framer for the next _read_exact().
+    """
     if len(magic) != 4:
         raise ValueError("magic must be 4 bytes")
 
+    buf = _framer(ser).buf
     deadline = time.time() + timeout_s
-    window = bytearray()
     while True:
+        idx = buf.find(magic)
+        if idx >= 0:
+            del buf[: idx + 4]
+            return
+        # Keep a 3-byte tail in case the magic straddles two reads.
+        if len(buf) > 3:
+            del buf[:-3]
         if time.time() > deadline:
             raise TimeoutError(f"serial timeout at {where}: waiting for {magic!r}")
-        b = ser.read(1)
-        if not b:
-            continue
-        window += b
-        if len(window) > 4:
-            window = window[-4:]
-        if len(window) == 4 and bytes(window) == magic:
-            return
+        chunk = ser.read(max(1, ser.in_waiting))
+        if chunk:
+            buf += chunk
 
 
 def query_info(ser, timeout_s: float = 10.0) -> DeviceInfo:
@@ -82,36 +169,68 @@ def query_info(ser, timeout_s: float = 10.0) -> DeviceInfo:
 
     # response
     _read_until_magic(ser, MAGIC_INFO, "INFO.magic", timeout_s)
-    payload = _read_exact(ser, 8, "INFO.payload", timeout_s)
-    T, F, H, hidden = struct.unpack("<4H", payload)
+    payload = _read_exact(ser, _HEADER_LEN, "INFO.payload", timeout_s)
+    T, F, H, hidden = _INFO_S.unpack(payload)
     return DeviceInfo(int(T), int(F), int(H), int(hidden))
 
 
-def infer_one(ser, x_flat_f32: bytes, H: int, timeout_s: float = 10.0) -> bytes:
-    """Send one sample (flattened float32 bytes) and receive prediction bytes.
-
-    Firmware response format is:
-      MAGIC_PRED + uint32(H_device) + float32[H_device]
-
-    This host validates H_device against expected H to avoid silent framing bugs.
+def send_infer(ser, x_flat_f32: BytesLike) -> None:
+    """Send one INFR frame without waiting for PRED.
 
-    Returns raw bytes of len H*4 (float32).
+    x_flat_f32 is any bytes-like object holding the flattened float32 sample
+    (e.g. a memoryview row of a contiguous batch), so callers need not copy.
     """
     if len(x_flat_f32) % 4 != 0:
         raise ValueError("x_flat_f32 must be float32 bytes")
 
     nfloats = len(x_flat_f32) // 4
-    ser.write(MAGIC_INFR)
-    ser.write(struct.pack("<I", nfloats))
-    ser.write(x_flat_f32)
+    # One write per frame: fewer syscalls / USB transfers and no split headers.
+    header = MAGIC_INFR + _U32_S.pack(nfloats)
+    ser.write(b"".join((header, x_flat_f32)))
     ser.flush()
 
+
+def _recv_pred_header(ser, H: int, timeout_s: float) -> None:
     _read_until_magic(ser, MAGIC_PRED, "PRED.magic", timeout_s)
 
-    # Firmware sends uint32(H) before payload.
-    h_bytes = _read_exact(ser, 4, "PRED.H", timeout_s)
-    (H_dev,) = struct.unpack("<I", h_bytes)
+    # Firmware sends uint32(H) before payload. Checked on every frame: it is the
+    # only place the firmware's error reply (PRED + uint32(0), no payload) shows up.
+    h_bytes = _read_exact(ser, _U32_S.size, "PRED.H", timeout_s)
+    (H_dev,) = _U32_S.unpack(h_bytes)
+    if H_dev == 0 and H != 0:
+        raise ValueError("Device rejected the INFR frame (payload size mismatch)")
     if int(H_dev) != int(H):
         raise ValueError(f"Device reported H={H_dev} but host expects H={H}")
 
+
+def recv_pred(ser, H: int, timeout_s: float = 10.0) -> bytes:
+    """Receive one PRED frame and return raw bytes of len H*4 (float32).
+
+    Firmware response format is:
+      MAGIC_PRED + uint32(H_device) + float32[H_device]
+
+    This host validates H_device against expected H to avoid silent framing bugs.
+    """
+    _recv_pred_header(ser, H, timeout_s)
     return _read_exact(ser, H * 4, "PRED.payload", timeout_s)
+
+
+def recv_pred_into(ser, out_buf: memoryview, timeout_s: float = 10.0) -> None:
+    """Receive one PRED frame directly into out_buf (a writable byte buffer).
+
+    H is taken from len(out_buf) // 4, e.g. one row of a preallocated float32
+    prediction array viewed as bytes. H_device is validated as in recv_pred().
+    """
+    if len(out_buf) % 4 != 0:
+        raise ValueError("out_buf must hold whole float32 values")
+    _recv_pred_header(ser, len(out_buf) // 4, timeout_s)
+    _read_exact_into(ser, out_buf, "PRED.payload", timeout_s)
+
+
+def infer_one(ser, x_flat_f32: BytesLike, H: int, timeout_s: float = 10.0) -> bytes:
+    """Send one sample (flattened float32 bytes) and receive prediction bytes.
+
+    Returns raw bytes of len H*4 (float32).
+    """
+    send_infer(ser, x_flat_f32)
+    return recv_pred(ser, H, timeout_s)
@@ -5,6 +5,8 @@ EdgeFlow V2 HTTP server.
 The server exposes a single container-friendly API:
 - POST /v2/infer      -> JSON response (predictions as lists)
 - POST /v2/infer_npy  -> application/octet-stream (.npy with pred)
+- POST /v2/infer_stream -> application/octet-stream, one record per sample as it
+                          completes: uint32(i) + float32[H] (H in X-Pred-H header)
 - GET  /v2/info       -> current device model dimensions
 - GET  /health        -> readiness probe
 
@@ -12,36 +14,124 @@ Request format (multipart/form-data)
 - model_bin   optional file  model_fp32.bin
 - model_meta  optional file  model_meta.json
 - input_npy   required file  input.npy  (float32 array of shape (N,T,F) or (T,F))
+- input_encoding  optional field  "x-blosc2" if input_npy is a blosc2.pack_array2() frame
+                  (float32 only, at most MAX_INPUT_BYTES once decompressed)
 """
 from __future__ import annotations
 
 import io
 import os
 import json
+import math
 import time
-from typing import Optional, Any, Dict
+import struct
+import asyncio
+import functools
+import threading
+from typing import Optional, Any, AsyncIterator, BinaryIO, Dict, Iterator, Set, Tuple
 from dataclasses import asdict, is_dataclass
 
 import numpy as np
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse, Response
+import orjson
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from .device_manager import DeviceManager
 
+try:
+    import blosc2
+except ImportError:  # optional: only needed for compressed uploads
+    blosc2 = None
+
 APP_PORT = int(os.getenv("PORT", "8080"))
 SERIAL_PORT = os.getenv("SERIAL_PORT", "/dev/ttyACM0")
 UART_BAUD = int(os.getenv("UART_BAUD", "115200"))
 IDF_BAUD = int(os.getenv("IDF_BAUD", "921600"))
 
+BLOSC2_ENCODING = "x-blosc2"
+# Upper bound on the decompressed size of a blosc2 upload (guards against bombs).
+MAX_INPUT_BYTES = int(os.getenv("MAX_INPUT_BYTES", str(256 * 1024 * 1024)))
+
+_STREAM_IDX = struct.Struct("<I")
+_STREAM_END = object()
+_stream_workers: Set["asyncio.Future[None]"] = set()  # strong refs to running stream workers
+
 app = FastAPI(title="EdgeFlow V2", version="2.0.0")
 mgr = DeviceManager(serial_port=SERIAL_PORT, uart_baud=UART_BAUD, idf_baud=IDF_BAUD)
 
 
-def _load_npy(upload_bytes: bytes) -> np.ndarray:
+class ORJSONResponse(Response):
+    """JSON response that serializes numpy arrays straight from their buffers."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _upload_file(upload: UploadFile) -> BinaryIO:
+    """Rewound SpooledTemporaryFile behind an upload, read without an extra copy."""
+    upload.file.seek(0)
+    return upload.file
+
+
+def _unpack_blosc2(buf: bytes) -> np.ndarray:
+    """Decode a blosc2.pack_array2() frame after validating its metadata.
+
+    blosc2.unpack_array2() trusts the kind/shape/dtype stored by the client, which
+    admits object dtypes and decompression bombs. Only a plain float32 numpy array
+    of shape (T,F) or (N,T,F), at most MAX_INPUT_BYTES, is decompressed here.
+    """
     try:
-        arr = np.load(io.BytesIO(upload_bytes), allow_pickle=False)
+        schunk = blosc2.schunk_from_cframe(buf, False)
+        kind, shape, descr = schunk.vlmeta["__pack_tensor__"]
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"failed to read .npy: {e}")
+        raise HTTPException(status_code=400, detail=f"invalid blosc2 input frame: {e}")
+
+    if kind != "numpy" or descr != "<f4":
+        raise HTTPException(
+            status_code=400,
+            detail=f"blosc2 input must be a float32 numpy array, got kind={kind!r} dtype={descr!r}",
+        )
+    if (
+        not isinstance(shape, (list, tuple))
+        or len(shape) not in (2, 3)
+        or not all(type(d) is int and d >= 0 for d in shape)
+    ):
+        raise HTTPException(status_code=400, detail=f"blosc2 input shape must be (T,F) or (N,T,F), got {shape!r}")
+
+    nbytes = math.prod(shape) * 4
+    if nbytes > MAX_INPUT_BYTES:
+        raise HTTPException(
+            status_code=400, detail=f"blosc2 input expands to {nbytes} bytes, limit is {MAX_INPUT_BYTES}"
+        )
+    if nbytes != schunk.nbytes:
+        raise HTTPException(
+            status_code=400, detail=f"blosc2 input metadata declares {nbytes} bytes but frame holds {schunk.nbytes}"
+        )
+
+    arr = np.empty(shape, dtype=np.float32)
+    try:
+        schunk.get_slice(out=arr)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"failed to unpack blosc2 input: {e}")
+    return arr
+
+
+def _load_npy(upload: UploadFile, encoding: Optional[str] = None) -> np.ndarray:
+    f = _upload_file(upload)
+    if encoding == BLOSC2_ENCODING:
+        if blosc2 is None:
+            raise HTTPException(status_code=415, detail="blosc2 is not installed on the server")
+        arr = _unpack_blosc2(f.read())
+    elif encoding:
+        raise HTTPException(status_code=400, detail=f"unsupported input_encoding: {encoding!r}")
+    else:
+        try:
+            arr = np.load(f, allow_pickle=False)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"failed to read .npy: {e}")
     if not isinstance(arr, np.ndarray):
         raise HTTPException(status_code=400, detail="uploaded .npy did not decode into an ndarray")
     if arr.dtype != np.float32:
@@ -49,6 +139,39 @@ def _load_npy(upload_bytes: bytes) -> np.ndarray:
     return arr
 
 
+@functools.lru_cache(maxsize=128)
+def _npy_header(shape: Tuple[int, ...], descr: str) -> bytes:
+    """.npy v1.0 header for a C-order array; the shape space per model is small."""
+    hdr = io.BytesIO()
+    np.lib.format.write_array_header_1_0(hdr, {"descr": descr, "fortran_order": False, "shape": shape})
+    return hdr.getvalue()
+
+
+def _npy_bytes(arr: np.ndarray) -> bytes:
+    """Serialize a C-contiguous array as .npy: cached header + raw buffer."""
+    return _npy_header(arr.shape, np.lib.format.dtype_to_descr(arr.dtype)) + arr.tobytes()
+
+
+def _drain_in_thread(
+    it: Iterator[Any], loop: asyncio.AbstractEventLoop, q: asyncio.Queue, stop: threading.Event
+) -> None:
+    # DeviceManager.infer_iter() holds the device lock across yields, so the whole
+    # generator must run on one thread; results are relayed to the event loop.
+    # stop is set when the client goes away: closing the generator early releases
+    # the lock and resyncs the port instead of finishing an unwanted batch.
+    try:
+        for item in it:
+            if stop.is_set():
+                break
+            loop.call_soon_threadsafe(q.put_nowait, item)
+    except BaseException as e:
+        loop.call_soon_threadsafe(q.put_nowait, e)
+    else:
+        loop.call_soon_threadsafe(q.put_nowait, _STREAM_END)
+    finally:
+        it.close()
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
     info = mgr.probe_info()
@@ -64,18 +187,19 @@ async def v2_infer(
     input_npy: UploadFile = File(...),
     model_bin: Optional[UploadFile] = File(None),
     model_meta: Optional[UploadFile] = File(None),
-) -> JSONResponse:
+    input_encoding: Optional[str] = Form(None),
+) -> ORJSONResponse:
     t0 = time.time()
 
-    x = _load_npy(await input_npy.read())
+    x = await run_in_threadpool(_load_npy, input_npy, input_encoding)
 
     flash_timing = None
     if model_bin is not None:
-        mb = await model_bin.read()
-        mm = await model_meta.read() if model_meta is not None else None
-        flash_timing = mgr.flash_model(mb, mm)
+        mb = _upload_file(model_bin)
+        mm = _upload_file(model_meta) if model_meta is not None else None
+        flash_timing = await run_in_threadpool(mgr.flash_model, mb, mm)
 
-    pred, timing = mgr.infer(x)
+    pred, timing = await run_in_threadpool(mgr.infer, x)
 
     total_ms = (time.time() - t0) * 1000.0
     out = {
@@ -86,9 +210,9 @@ async def v2_infer(
             "total": total_ms,
             "mean_per_sample": timing["mean_per_sample_ms"],
         },
-        "pred": pred.tolist(),
+        "pred": pred,
     }
-    return JSONResponse(out)
+    return ORJSONResponse(out)
 
 
 @app.post("/v2/infer_npy")
@@ -96,16 +220,67 @@ async def v2_infer_npy(
     input_npy: UploadFile = File(...),
     model_bin: Optional[UploadFile] = File(None),
     model_meta: Optional[UploadFile] = File(None),
+    input_encoding: Optional[str] = Form(None),
 ) -> Response:
-    x = _load_npy(await input_npy.read())
+    x = await run_in_threadpool(_load_npy, input_npy, input_encoding)
+
+    if model_bin is not None:
+        mb = _upload_file(model_bin)
+        mm = _upload_file(model_meta) if model_meta is not None else None
+        await run_in_threadpool(mgr.flash_model, mb, mm)
+
+    pred, _timing = await run_in_threadpool(mgr.infer, x)
+
+    return Response(content=_npy_bytes(pred), media_type="application/octet-stream")
+
+
+@app.post("/v2/infer_stream")
+async def v2_infer_stream(
+    input_npy: UploadFile = File(...),
+    model_bin: Optional[UploadFile] = File(None),
+    model_meta: Optional[UploadFile] = File(None),
+    input_encoding: Optional[str] = Form(None),
+) -> StreamingResponse:
+    x = await run_in_threadpool(_load_npy, input_npy, input_encoding)
 
     if model_bin is not None:
-        mb = await model_bin.read()
-        mm = await model_meta.read() if model_meta is not None else None
-        mgr.flash_model(mb, mm)
+        mb = _upload_file(model_bin)
+        mm = _upload_file(model_meta) if model_meta is not None else None
+        await run_in_threadpool(mgr.flash_model, mb, mm)
+
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    rows = mgr.infer_iter(x, on_info=lambda info: loop.call_soon_threadsafe(q.put_nowait, info))
+    # Same threadpool (and limiter) as the other endpoints, not a thread per request.
+    worker = asyncio.ensure_future(run_in_threadpool(_drain_in_thread, rows, loop, q, stop))
+    _stream_workers.add(worker)
+    worker.add_done_callback(_stream_workers.discard)
+
+    # The first item is the batch's DeviceInfo (H for the header, even when N == 0)
+    # or a setup error such as a shape mismatch, which then fails the request
+    # instead of truncating an already-started stream.
+    try:
+        info = await q.get()
+    except BaseException:
+        stop.set()
+        raise
+    if isinstance(info, BaseException):
+        raise info
+    headers = {"X-Pred-H": str(int(info.H))}
 
-    pred, _timing = mgr.infer(x)
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            while True:
+                item = await q.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                i, y = item
+                yield _STREAM_IDX.pack(i) + y.tobytes()
+        finally:
+            # Client disconnect cancels this generator; tell the worker to stop.
+            stop.set()
 
-    buf = io.BytesIO()
-    np.save(buf, pred, allow_pickle=False)
-    return Response(content=buf.getvalue(), media_type="application/octet-stream")
+    return StreamingResponse(body(), media_type="application/octet-stream", headers=headers)
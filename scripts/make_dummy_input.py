@@ -20,6 +20,7 @@ def main() -> None:
     p.add_argument("--F", type=int, default=None)
     p.add_argument("--n", type=int, default=1, help="number of samples N")
     p.add_argument("--out", type=Path, required=True, help="output .npy")
+    p.add_argument("--seed", type=int, default=None, help="RNG seed (PCG64) for reproducible inputs")
     args = p.parse_args()
 
 
@@ -31,7 +32,8 @@ def main() -> None:
         T, F = int(args.T), int(args.F)
 
     N = int(args.n)
-    x = np.random.randn(N, T, F).astype(np.float32)
+    rng = np.random.Generator(np.random.PCG64(args.seed))
+    x = rng.standard_normal((N, T, F), dtype=np.float32)
     if N == 1:
         x = x[0]  # (T,F)
     np.save(args.out, x, allow_pickle=False)